@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+import tempfile
+
+import orjson
+from openai import AsyncOpenAI
+
+import my_utils
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 30
+
+
+async def extract_rows_batched(openai_client: AsyncOpenAI,
+                               extraction_goals: list[str],
+                               page_markdowns: list[str],
+                               row_schema: str) -> list[list[dict]]:
+    """Run many extraction prompts through the OpenAI Batch API in one submission.
+
+    Opt-in alternative to the interactive extractor agent for bulk,
+    latency-insensitive runs: batched requests are billed at half price and
+    the whole set completes within the batch window instead of being paced
+    by one live round-trip per page.
+
+    Args:
+        extraction_goals: one goal per page, aligned with page_markdowns.
+        page_markdowns: pre-rendered markdown of each page (see my_utils.html_to_markdown).
+        row_schema: the simplified single-row schema shared by all pages.
+
+    Returns one list of row dicts per input page, in input order.
+    """
+    system_prompt = my_utils.read_prompt_file("my_extractor_system_00.md")
+    output_schema = my_utils.convert_simplified_schema_to_rows_in_openai_output_schema(row_schema)
+
+    with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as jsonl_file:
+        for request_index, (goal, markdown) in enumerate(zip(extraction_goals, page_markdowns)):
+            request_row = {
+                "custom_id": f"extract-{request_index}",
+                "method": "POST",
+                "url": "/v1/responses",
+                "body": {
+                    "model": "gpt-4.1",
+                    "input": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": (f"Extraction goal: {goal}\n\n"
+                                                     f"Here is the full page content:\n{markdown}")},
+                    ],
+                    "text": output_schema,
+                    "temperature": 0.0,
+                },
+            }
+            jsonl_file.write(orjson.dumps(request_row))
+            jsonl_file.write(b"\n")
+        jsonl_path = jsonl_file.name
+
+    try:
+        with open(jsonl_path, "rb") as f:
+            input_file = await openai_client.files.create(file=f, purpose="batch")
+    finally:
+        # The JSONL holds every page's full markdown; don't leave it in /tmp
+        os.unlink(jsonl_path)
+
+    batch = await openai_client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/responses",
+        completion_window="24h")
+    logger.info(f"Submitted batch {batch.id} with {len(extraction_goals)} extraction requests")
+
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        await asyncio.sleep(POLL_INTERVAL_SECONDS)
+        batch = await openai_client.batches.retrieve(batch.id)
+        logger.info(f"Batch {batch.id} status: {batch.status}")
+
+    if batch.status != "completed":
+        raise RuntimeError(f"Batch {batch.id} finished with status {batch.status}")
+
+    output_content = await openai_client.files.content(batch.output_file_id)
+
+    rows_by_index: dict[int, list[dict]] = {}
+    for line in output_content.content.splitlines():
+        if not line:
+            continue
+        result = orjson.loads(line)
+        request_index = int(result["custom_id"].removeprefix("extract-"))
+
+        # Failed requests carry a null response and a non-null error; skip
+        # them so one bad page doesn't lose the rest of the batch
+        if result.get("error") or not result.get("response"):
+            logger.error(f'Batch request {result["custom_id"]} failed: {result.get("error")}')
+            continue
+
+        output_text = result["response"]["body"]["output"][0]["content"][0]["text"]
+        rows_by_index[request_index] = orjson.loads(output_text)["rows"]
+
+    return [rows_by_index.get(i, []) for i in range(len(extraction_goals))]
@@ -1,6 +1,16 @@
-import base64
-import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import orjson
+import pybase64
+
+# Module-level so it's built once, not per save; keeps the old CustomEncoder fallback
+def json_default(obj):
+    try:
+        return str(obj)
+    except:
+        return f"<Non-serializable object of type {type(obj).__name__}>"
 
 def print_message_with_header(header, message):
     print("\n")
@@ -10,30 +20,45 @@ def print_message_with_header(header, message):
     print(message)
 
 def remove_screenshots(obj):
+    # Mutate in place instead of rebuilding the whole tree: only the nodes
+    # that actually carry a "screenshot" key pay for the removal.
     if isinstance(obj, dict):
-        # Create a new dict without "screenshot" keys
-        return {k: remove_screenshots(v) for k, v in obj.items() if k != "screenshot"}
+        obj.pop("screenshot", None)
+        for value in obj.values():
+            remove_screenshots(value)
     elif isinstance(obj, list):
-        # Process each item in the list
-        return [remove_screenshots(item) for item in obj]
-    else:
-        # Return primitive values as is
-        return obj
-    
+        for item in obj:
+            remove_screenshots(item)
+
+
+def save_screenshots_to_disk(history, base_path):
+    # Kept in its own function so the base64 list history.screenshots()
+    # materializes is garbage-collected on return, before the big JSON dumps
+    # in save_history_to_disk allocate their buffers.
+    def write_screenshot(numbered_screenshot):
+        screenshot_number, screenshot = numbered_screenshot
+        # pybase64 uses SIMD (AVX2/NEON) decode kernels, ~5x faster than stdlib base64
+        Path(f"{base_path}_screenshot_{screenshot_number}.png").write_bytes(
+            pybase64.b64decode(screenshot, validate=False))
+
+    # Decode releases the GIL inside the C extension and the writes are pure I/O,
+    # so overlapping screenshots on a small pool scales close to the worker count.
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+        list(executor.map(write_screenshot, enumerate(history.screenshots())))
+
+
 def save_history_to_disk(history, log_dir, prefix):
-    with open(os.path.join(log_dir, f"{prefix}_history_complete.json"), "w") as f:
-        json_history = history.model_dump_json(indent=2)
-        json_history = json.loads(json_history)
-        json_history = remove_screenshots(json_history)
-        json.dump(json_history, f, indent=2)
-    
-    class CustomEncoder(json.JSONEncoder):
-        def default(self, obj):
-            try:
-                return str(obj)
-            except:
-                return f"<Non-serializable object of type {type(obj).__name__}>"
-    
+    # Join once; every output path below is a cheap f-string on this base
+    base_path = os.path.join(log_dir, prefix)
+
+    save_screenshots_to_disk(history, base_path)
+
+    # model_dump gives us the dict directly; no need to serialize and re-parse
+    json_history = history.model_dump(mode="json")
+    remove_screenshots(json_history)
+    Path(f"{base_path}_history_complete.json").write_bytes(
+        orjson.dumps(json_history, option=orjson.OPT_INDENT_2))
+
     history_data = {
         "visited_urls": history.urls(),
         "executed_actions": history.action_names(),
@@ -42,21 +67,18 @@ def save_history_to_disk(history, log_dir, prefix):
         "model_actions": history.model_actions(),
         "final_result": history.final_result(),
     }
-    
-    with open(os.path.join(log_dir, f"{prefix}_history_components.json"), "w") as f:
-        json.dump(history_data, f, indent=2, cls=CustomEncoder)
-
-    screenshot_number = 0
-    for screenshot in history.screenshots():
-        screenshot_file = os.path.join(log_dir, f"{prefix}_screenshot_{screenshot_number}.png")
-        with open(screenshot_file, "wb") as f:
-            f.write(base64.b64decode(screenshot))
-        screenshot_number += 1
-
-def print_history_summary(history):
-    print_message_with_header("VISITED URLS", history.urls())
-    print_message_with_header("EXECUTED ACTIONS", history.action_names())
-    print_message_with_header("EXTRACTED CONTENT", history.extracted_content())
-    print_message_with_header("ERRORS", history.errors())
-    print_message_with_header("MODEL ACTIONS WITH PARAMETERS", history.model_actions())
-    print_message_with_header("FINAL RESULT", history.final_result()) 
\ No newline at end of file
+
+    Path(f"{base_path}_history_components.json").write_bytes(
+        orjson.dumps(history_data, default=json_default, option=orjson.OPT_INDENT_2))
+
+    return history_data
+
+def print_history_summary(history_data):
+    # Takes the dict returned by save_history_to_disk so the history accessors
+    # (each a full pass over the step list) are only called once.
+    print_message_with_header("VISITED URLS", history_data["visited_urls"])
+    print_message_with_header("EXECUTED ACTIONS", history_data["executed_actions"])
+    print_message_with_header("EXTRACTED CONTENT", history_data["extracted_content"])
+    print_message_with_header("ERRORS", history_data["errors"])
+    print_message_with_header("MODEL ACTIONS WITH PARAMETERS", history_data["model_actions"])
+    print_message_with_header("FINAL RESULT", history_data["final_result"])
\ No newline at end of file
@@ -1,10 +1,13 @@
 import logging
+import logging.handlers
+import queue
 import datetime
 import os
 from browser_use import Browser, BrowserConfig, BrowserContextConfig
 import asyncio
 from dotenv import load_dotenv
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, OpenAI
 from my_navigator_agent import MyNavigatorAgent
 from my_brain_agent import MyBrainAgent
 from my_utils import MyAgentContext
@@ -14,6 +17,20 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+def setup_logging() -> logging.handlers.QueueListener:
+    """Route records through a queue so handler I/O never blocks the event loop."""
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    return listener
+
+
 def list_available_openai_models():
     client = OpenAI()
     models = client.models.list()
@@ -45,9 +62,13 @@ async def main():
     save_dir = f"output/{run_id}/"
     os.makedirs(save_dir, exist_ok=True)
 
-    openai_client = OpenAI()
+    # One pooled client for the whole run: every agent shares it through the
+    # context, so keep-alive connections avoid a TLS handshake per LLM call.
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_keepalive_connections=100, keepalive_expiry=30))
+    openai_client = AsyncOpenAI(http_client=http_client)
 
-    ctx = MyAgentContext(browser_context=browser_context, 
+    ctx = MyAgentContext(browser_context=browser_context,
                          openai_client=openai_client, 
                          save_dir=save_dir,
                          run_id=run_id)
@@ -67,7 +88,12 @@ async def main():
             await browser_context.close()
         if browser:
             await browser.close()
+        await openai_client.close()
 
 
 # list_available_openai_models()
-asyncio.run(main())
\ No newline at end of file
+log_listener = setup_logging()
+try:
+    asyncio.run(main())
+finally:
+    log_listener.stop()
\ No newline at end of file
@@ -1,7 +1,7 @@
-import base64
 import datetime
-import json
+import functools
 import os
+from pathlib import Path
 from anthropic import Anthropic
 from langchain_anthropic import ChatAnthropic
 from langchain_openai import ChatOpenAI
@@ -59,21 +59,93 @@ class CourseList(BaseModel):
     courses: list[Course]
 
 
+_FILENAME_STRIP_TABLE = str.maketrans("", "", ".',")
+
+@functools.lru_cache(maxsize=1024)
 def to_valid_filename(s: str):
-    return s.lower().replace(" ", "_").replace(".", "").replace("'", "").replace(",", "")
+    # Single C-level pass instead of chained .replace calls; cached because the
+    # same school/department names come through several times per run.
+    return s.translate(_FILENAME_STRIP_TABLE).lower().replace(" ", "_")
     
 
+# Task prompts hoisted to module level; the per-task functions only fill in the
+# one or two names that vary instead of rebuilding the whole string each call.
+SCHOOLS_TASK = """
+    Your goal is to get a list of all Harvard University's schools.
+    The output columns are:
+        School Name,
+        School Website URL.
+    If you need to navigate to a school page, open a new tab so that you can keep the tab with the schools list open and come back later.
+    Persist the list of schools to file using the save_schools action.
+    """
+
+SCHOOL_TASK_TEMPLATE = """
+    Get a list of all the departments for the school {school_name} of Harvard University.
+    Use the search results from Google only to get the URLs of the school or any departments, but
+    never to extract departments themselvels.
+    Try to find a single page where all departments are listed.
+    The output columns are:
+        Department Name,
+        Department Website URL.
+    Persist the list of departments to file using the save_departments action.
+    """
+
+DEPARTMENT_TASK_TEMPLATE = """
+    Get a list of all the courses for the department '{department_name}' of the school '{school_name}'.
+    The output columns are:
+        Course Name,
+        Course Description,
+        Course Code,
+        Course Term.
+    Try to find a single page where all courses are listed.
+    The academic year we want is 2024-2025.
+    The department might not offer courses for that year, in that case just return an empty list.
+    Persist the list of courses to file using the save_courses action.
+    """
+
+
+def write_file_atomically(path, text):
+    # Write to a sibling tmp file and rename into place, so a crash mid-write
+    # can never leave a truncated cache file behind.
+    tmp_path = path + ".tmp"
+    Path(tmp_path).write_text(text)
+    os.replace(tmp_path, path)
+
+
+# In-process cache of parsed out/*.json models, keyed by path and invalidated by
+# file mtime, so warm reads skip both the JSON parse and the Pydantic validation.
+_model_file_cache = {}
+
+def load_model_file(path, model_cls):
+    # Single stat instead of exists-then-stat; also closes the TOCTOU window
+    try:
+        mtime = os.path.getmtime(path)
+    except FileNotFoundError:
+        return None
+
+    cached = _model_file_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    # model_validate_json parses the raw bytes straight into the model in
+    # pydantic-core, skipping the intermediate json.load dict.
+    with open(path, "rb") as f:
+        model = model_cls.model_validate_json(f.read())
+    _model_file_cache[path] = (mtime, model)
+    return model
+
+
 def save_history(history, log_dir, prefix):
-    from history_logger import save_history_to_disk, print_history_summary    
-    save_history_to_disk(history, log_dir, prefix)
-    print_history_summary(history)
+    from history_logger import save_history_to_disk, print_history_summary
+    history_data = save_history_to_disk(history, log_dir, prefix)
+    print_history_summary(history_data)
 
 
-def recreate_log_dir(log_dir):
+async def recreate_log_dir(log_dir):
     import shutil
-    if os.path.exists(log_dir):
-        shutil.rmtree(log_dir) 
-    os.makedirs(log_dir, exist_ok=True)
+    # rmtree does one unlink syscall per file, so keep it off the event loop
+    await asyncio.to_thread(shutil.rmtree, log_dir, ignore_errors=True)
+    await asyncio.to_thread(os.makedirs, log_dir, exist_ok=True)
 
 
 
@@ -85,9 +157,9 @@ def configure_departments_controller():
         departments_file = f"out/departments_{to_valid_filename(department_list.school_name)}.json"
 
         print(f"save_departments: {department_list.model_dump_json(indent=2)}")
-    
-        with open(departments_file, "w") as f:
-            f.write(department_list.model_dump_json(indent=2))
+
+        # No indent: these files are only read back by the script itself
+        write_file_atomically(departments_file, department_list.model_dump_json())
     
     return controller
 
@@ -101,8 +173,7 @@ def configure_schools_controller():
 
         print(f"save_schools: {school_list.model_dump_json(indent=2)}")
 
-        with open(schools_file, "w") as f:
-            f.write(school_list.model_dump_json(indent=2))
+        write_file_atomically(schools_file, school_list.model_dump_json())
 
     return controller
 
@@ -116,8 +187,7 @@ def configure_courses_controller():
 
         print(f"save_courses: {course_list.model_dump_json(indent=2)}")
 
-        with open(courses_file, "w") as f:
-            f.write(course_list.model_dump_json(indent=2))
+        write_file_atomically(courses_file, course_list.model_dump_json(indent=2))
 
     return controller
 
@@ -173,7 +243,7 @@ async def main():
     )
     
     log_dir = f"logs/current"
-    recreate_log_dir(log_dir)
+    await recreate_log_dir(log_dir)
     os.makedirs("out", exist_ok=True)
 
     try:
@@ -208,32 +278,30 @@ async def run_all_tasks(browser: Browser, llm: BaseChatModel, planner_llm: BaseC
     # for school in schools.schools:
     #     await run_task_department(browser, llm, log_dir, school)
 
-    for department in departments.departments:
-         courses = await run_task_fetch_courses_for_department(browser=browser, 
-                                                               llm=llm, 
-                                                               planner_llm=planner_llm, 
-                                                               log_dir=log_dir, 
-                                                               school=school, 
+    # Each course task is dominated by LLM/browser round trips and gets its own
+    # browser context, so they can run concurrently; the semaphore bounds how
+    # many agents hammer the browser and the API at once.
+    semaphore = asyncio.Semaphore(4)
+
+    async def fetch_courses_bounded(department):
+        async with semaphore:
+            return await run_task_fetch_courses_for_department(browser=browser,
+                                                               llm=llm,
+                                                               planner_llm=planner_llm,
+                                                               log_dir=log_dir,
+                                                               school=school,
                                                                department=department)
 
+    await asyncio.gather(*(fetch_courses_bounded(department) for department in departments.departments))
 
-async def run_task_fetch_schools(browser, llm, planner_llm, log_dir) -> SchoolList:
-    if os.path.exists(f"out/schools.json"):
-        with open(f"out/schools.json", "r") as f:
-            schools = json.load(f)
-        return SchoolList(**schools)
 
-    schools_task = f"""
-    Your goal is to get a list of all Harvard University's schools.
-    The output columns are:
-        School Name,
-        School Website URL.
-    If you need to navigate to a school page, open a new tab so that you can keep the tab with the schools list open and come back later.
-    Persist the list of schools to file using the save_schools action.
-    """
+async def run_task_fetch_schools(browser, llm, planner_llm, log_dir) -> SchoolList:
+    schools = load_model_file(f"out/schools.json", SchoolList)
+    if schools is not None:
+        return schools
 
     schools_agent = Agent(
-        task=schools_task,
+        task=SCHOOLS_TASK,
         llm=llm,
         planner_llm=planner_llm,
         controller=configure_schools_controller(),
@@ -243,38 +311,25 @@ async def run_task_fetch_schools(browser, llm, planner_llm, log_dir) -> SchoolLi
         save_conversation_path=f"{log_dir}/schools.json"
     )
     history = await schools_agent.run(max_steps=10000)
-    save_history(history, log_dir, prefix="schools")
+    # History persistence is many writes (JSON + N screenshots); keep it off the loop
+    await asyncio.to_thread(save_history, history, log_dir, "schools")
 
     # The agent persists to file, so to return the list of schools we simply read from it
-    if os.path.exists(f"out/schools.json"):
-        with open(f"out/schools.json", "r") as f:
-            schools = json.load(f)
-    else:
+    schools = load_model_file(f"out/schools.json", SchoolList)
+    if schools is None:
         raise Exception("Schools file not found")
 
-    return SchoolList(**schools)
+    return schools
 
 
 
 async def run_task_fetch_departments_for_school(browser, llm, planner_llm, log_dir, school: School):
-    if os.path.exists(f"out/departments_{to_valid_filename(school.school_name)}.json"):
-        with open(f"out/departments_{to_valid_filename(school.school_name)}.json", "r") as f:
-            departments = json.load(f)
-        return DepartmentList(**departments)
-
-    school_task = f"""
-    Get a list of all the departments for the school {school.school_name} of Harvard University.
-    Use the search results from Google only to get the URLs of the school or any departments, but
-    never to extract departments themselvels.
-    Try to find a single page where all departments are listed.   
-    The output columns are:
-        Department Name,
-        Department Website URL.
-    Persist the list of departments to file using the save_departments action.
-    """
+    departments = load_model_file(f"out/departments_{to_valid_filename(school.school_name)}.json", DepartmentList)
+    if departments is not None:
+        return departments
 
     agent = Agent(
-        task=school_task,
+        task=SCHOOL_TASK_TEMPLATE.format(school_name=school.school_name),
         llm=llm,
         planner_llm=planner_llm,
         controller=configure_departments_controller(),
@@ -284,36 +339,23 @@ async def run_task_fetch_departments_for_school(browser, llm, planner_llm, log_d
         save_conversation_path=f"{log_dir}/departments_{to_valid_filename(school.school_name)}.json"
     )
     history = await agent.run(max_steps=10000)
+
+    await asyncio.to_thread(save_history,
+                            history,
+                            log_dir,
+                            f"departments_{to_valid_filename(school.school_name)}")
     
-    save_history(history=history, 
-                 log_dir=log_dir, 
-                 prefix=f"departments_{to_valid_filename(school.school_name)}")
-    
-    if os.path.exists(f"out/departments_{to_valid_filename(school.school_name)}.json"):
-        with open(f"out/departments_{to_valid_filename(school.school_name)}.json", "r") as f:
-            departments = json.load(f)
-    else:
+    departments = load_model_file(f"out/departments_{to_valid_filename(school.school_name)}.json", DepartmentList)
+    if departments is None:
         raise Exception("Departments file not found")
-    
-    return DepartmentList(**departments)
 
+    return departments
 
-async def run_task_fetch_courses_for_department(browser, llm, planner_llm, log_dir, school: School, department: Department):
-    department_task = f"""
-    Get a list of all the courses for the department '{department.department_name}' of the school '{school.school_name}'.
-    The output columns are:
-        Course Name,
-        Course Description,
-        Course Code,
-        Course Term.
-    Try to find a single page where all courses are listed.
-    The academic year we want is 2024-2025.
-    The department might not offer courses for that year, in that case just return an empty list.
-    Persist the list of courses to file using the save_courses action.
-    """
 
+async def run_task_fetch_courses_for_department(browser, llm, planner_llm, log_dir, school: School, department: Department):
     agent = Agent(
-        task=department_task,
+        task=DEPARTMENT_TASK_TEMPLATE.format(department_name=department.department_name,
+                                             school_name=school.school_name),
         llm=llm,
         planner_llm=planner_llm,
         controller=configure_courses_controller(),
@@ -326,9 +368,10 @@ async def run_task_fetch_courses_for_department(browser, llm, planner_llm, log_d
 
     history = await agent.run(max_steps=10000)
 
-    save_history(history=history, 
-                log_dir=log_dir, 
-                prefix=f"courses_{to_valid_filename(department.department_name)}")
+    await asyncio.to_thread(save_history,
+                            history,
+                            log_dir,
+                            f"courses_{to_valid_filename(department.department_name)}")
 
 # asyncio.run(list_available_openai_models())
 # asyncio.run(list_available_anthropic_models())
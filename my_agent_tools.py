@@ -3,21 +3,100 @@ import json
 import logging
 import os
 import csv
+import re
+import orjson
 from tabulate import tabulate
 from typing import Any, Awaitable, Callable, List, Optional
-from functools import cached_property
+from urllib.parse import quote_plus
+from dataclasses import asdict, dataclass
+from functools import lru_cache, partial
 from pydantic import BaseModel, Field
 import datetime
 
 from openai.types.responses import ResponseFunctionToolCall, Response
 from agents.function_schema import function_schema
 from agents import RunContextWrapper
-from my_utils import MyAgentContext, format_json_pretty
+from my_utils import MyAgentContext, format_obj_pretty
 
 logger = logging.getLogger(__name__)
 
 
-class ActionResult(BaseModel):
+# Pre-bound format method: the static part of the search URL is assembled once
+_google_search_url = 'https://www.google.com/search?udm=14&q={}'.format
+
+
+# Module-level JS sources: the browser caches the compiled script per source
+# string, so reusing the same constant avoids re-parsing on every call.
+_DROPDOWN_OPTIONS_JS = """
+    (xpath) => {
+        const select = document.evaluate(xpath, document, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        if (!select) return null;
+
+        return {
+            options: Array.from(select.options).map(opt => ({
+                text: opt.text, //do not trim, because we are doing exact match in select_dropdown_option
+                value: opt.value,
+                index: opt.index
+            })),
+            id: select.id,
+            name: select.name
+        };
+    }
+"""
+
+# Walks text nodes and scrolls the first visible match into view; returns
+# whether a match was found.
+_SCROLL_TO_TEXT_JS = """
+    (text) => {
+        const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+        let node;
+        while (node = walker.nextNode()) {
+            if (node.nodeValue.includes(text)) {
+                const el = node.parentElement;
+                if (el && el.offsetParent) {
+                    el.scrollIntoView({block: 'center'});
+                    return true;
+                }
+            }
+        }
+        return false;
+    }
+"""
+
+_FIND_DROPDOWN_JS = """
+    (xpath) => {
+        try {
+            const select = document.evaluate(xpath, document, null,
+                XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            if (!select) return null;
+            if (select.tagName.toLowerCase() !== 'select') {
+                return {
+                    error: `Found element but it's a ${select.tagName}, not a SELECT`,
+                    found: false
+                };
+            }
+            return {
+                id: select.id,
+                name: select.name,
+                found: true,
+                tagName: select.tagName,
+                optionCount: select.options.length,
+                currentValue: select.value,
+                availableOptions: Array.from(select.options).map(o => o.text.trim())
+            };
+        } catch (e) {
+            return {error: e.toString(), found: false};
+        }
+    }
+"""
+
+
+# A plain dataclass: ActionResult is built on every tool call and never needs
+# validation, so slots beat a pydantic model here. Frozen because results are
+# read-only once produced; anything downstream builds a new one.
+@dataclass(slots=True, frozen=True)
+class ActionResult:
     # The name of the action that was executed.
     action_name: str = "default_action_name"
 
@@ -33,6 +112,36 @@ class ActionResult(BaseModel):
 
 
 
+def _invalidate_selector_map(ctx: RunContextWrapper[MyAgentContext]) -> None:
+    """Mark the cached DOM snapshot stale; call after any action that can change the page."""
+    ctx.step_id += 1
+    ctx.selector_map_cache = None
+
+
+async def _get_selector_map(ctx: RunContextWrapper[MyAgentContext]) -> dict:
+    """Fetch the selector map once per tool call.
+
+    handle_tool_call invalidates before every dispatch (each agent step builds
+    a fresh browser-state snapshot that renumbers the indices), so the cache
+    only spans the lookups within a single tool invocation.
+    """
+    cache = ctx.selector_map_cache
+    if cache is not None and cache[0] == ctx.step_id:
+        return cache[1]
+
+    selector_map = await ctx.browser_context.get_selector_map()
+    ctx.selector_map_cache = (ctx.step_id, selector_map)
+    return selector_map
+
+
+async def _get_dom_element(ctx: RunContextWrapper[MyAgentContext], index: int):
+    """Checked element lookup: map fetch and index resolution in one await."""
+    element_node = (await _get_selector_map(ctx)).get(index)
+    if element_node is None:
+        raise Exception(f'Element index {index} does not exist - retry or use alternative actions')
+    return element_node
+
+
 async def done(ctx: RunContextWrapper[MyAgentContext], success: bool, message_to_user: str) -> ActionResult:
     """The agent has finished the task with success or failure, for whatever the reason.
     
@@ -50,8 +159,9 @@ async def search_google(ctx: RunContextWrapper[MyAgentContext], query: str) -> A
         query: str - The search query to use. Should be concrete and not vague or super long, like how humans search in Google. Focus on the single most important items.
     """
     page = await ctx.browser_context.get_current_page()
-    await page.goto(f'https://www.google.com/search?q={query}&udm=14')
-    await page.wait_for_load_state()
+    # DOMContentLoaded is enough for the agent to read the results page
+    await page.goto(_google_search_url(quote_plus(query)), wait_until='domcontentloaded')
+    _invalidate_selector_map(ctx)
     return ActionResult(action_name="search_google", action_result_msg=f'Searched for "{query}" using Google', success=True)
 
 
@@ -59,6 +169,7 @@ async def go_back(ctx: RunContextWrapper[MyAgentContext]) -> ActionResult:
     """Navigate back to the previous page in the browser history of the current tab.
     """
     await ctx.browser_context.go_back()
+    _invalidate_selector_map(ctx)
     return ActionResult(action_name="go_back", action_result_msg='Navigated back', success=True)
 
 
@@ -69,8 +180,8 @@ async def go_to_url(ctx: RunContextWrapper[MyAgentContext], url: str) -> ActionR
         url: str - The URL to navigate to.
     """
     page = await ctx.browser_context.get_current_page()
-    await page.goto(url)
-    await page.wait_for_load_state()
+    await page.goto(url, wait_until='domcontentloaded')
+    _invalidate_selector_map(ctx)
     return ActionResult(action_name="go_to_url", action_result_msg=f'Navigated to {url}', success=True)
 
 
@@ -81,11 +192,10 @@ async def input_text(ctx: RunContextWrapper[MyAgentContext], index: int, text: s
         index: int - The index of the element to input text into.
         text: str - The text to input.
     """
-    if index not in await ctx.browser_context.get_selector_map():
-        raise Exception(f'Element index {index} does not exist - retry or use alternative actions')
-
-    element_node = await ctx.browser_context.get_dom_element_by_index(index)
+    element_node = await _get_dom_element(ctx, index)
     await ctx.browser_context._input_text_element_node(element_node, text)
+    # Typing can fire onchange/autocomplete handlers that mutate the DOM
+    _invalidate_selector_map(ctx)
 
     return ActionResult(action_name="input_text", action_result_msg=f'Input {text} into index {index}', success=True)
 
@@ -98,15 +208,17 @@ async def click_element(ctx: RunContextWrapper[MyAgentContext], index: int) -> A
     """
     session = await ctx.browser_context.get_session()
 
-    if index not in await ctx.browser_context.get_selector_map():
-        raise Exception(f'Element with index {index} does not exist - retry or use alternative actions')
-
-    element_node = await ctx.browser_context.get_dom_element_by_index(index)
+    element_node = await _get_dom_element(ctx, index)
     initial_pages = len(session.context.pages)
 
-    # if element has file uploader then dont click
-    if await ctx.browser_context.is_file_uploader(element_node):
-        return ActionResult(action_name="click_element", 
+    # if element has file uploader then dont click. Only <input> can open the
+    # dialog, so resolve the common tags synchronously and keep the expensive
+    # recursive check for ambiguous inputs.
+    if element_node.tag_name == 'input' and (
+            element_node.attributes.get('type') == 'file'
+            or ('type' not in element_node.attributes
+                and await ctx.browser_context.is_file_uploader(element_node))):
+        return ActionResult(action_name="click_element",
                             action_result_msg="Index {index} - has an element which opens file upload dialog. " +
                                               "To upload files please use a specific function to upload files", 
                             success=False)
@@ -123,11 +235,15 @@ async def click_element(ctx: RunContextWrapper[MyAgentContext], index: int) -> A
             new_tab_msg = 'New tab opened - switching to it'
             msg += f' - {new_tab_msg}'
             await ctx.browser_context.switch_to_tab(-1)
-        
+
+        # Clicks can navigate or mutate the DOM, so drop the cached snapshot
+        _invalidate_selector_map(ctx)
         return ActionResult(action_name="click_element", action_result_msg=msg, success=True)
     except Exception as e:
+        # The click may have mutated the page before failing
+        _invalidate_selector_map(ctx)
         return ActionResult(
-            action_name="click_element", 
+            action_name="click_element",
             action_result_msg=f"Element not clickable with index {index} - most likely the page changed. Exception\n: {str(e)}",
             success=False)
 
@@ -139,6 +255,7 @@ async def open_tab(ctx: RunContextWrapper[MyAgentContext], url: str) -> ActionRe
         url: str - The URL to open in the new tab.
     """
     await ctx.browser_context.create_new_tab(url)
+    _invalidate_selector_map(ctx)
 
     return ActionResult(action_name="open_tab", action_result_msg=f'Opened new tab with {url}', success=True)
 
@@ -150,47 +267,53 @@ async def switch_tab(ctx: RunContextWrapper[MyAgentContext], page_id: int) -> Ac
         page_id: int - The ID of the tab to switch to.
     """
     await ctx.browser_context.switch_to_tab(page_id)
-    # Wait for tab to be ready
+    # Wait for tab to be ready; DOMContentLoaded is enough for the agent to
+    # act, capped at the configured page-load budget instead of the 30s default
     page = await ctx.browser_context.get_current_page()
-    await page.wait_for_load_state()
-    
+    await page.wait_for_load_state('domcontentloaded',
+                                   timeout=ctx.browser_context.config.maximum_wait_page_load_time * 1000)
+    _invalidate_selector_map(ctx)
+
     return ActionResult(action_name="switch_tab", action_result_msg=f'Switched to tab {page_id}', success=True)
 
 
-async def scroll_down(ctx: RunContextWrapper[MyAgentContext], amount: int) -> ActionResult:
-    """Scroll down the page by a specified amount of pixels.
-    
+async def scroll(ctx: RunContextWrapper[MyAgentContext], amount: int) -> ActionResult:
+    """Scroll the page vertically by a specified amount of pixels.
+
     Args:
-        amount: int - The number of pixels to scroll down. If 0, scrolls down one page height.
+        amount: int - The number of pixels to scroll. Positive scrolls down, negative scrolls up. If 0, scrolls down one page height.
     """
     page = await ctx.browser_context.get_current_page()
-    
+
     if amount != 0:
-        await page.evaluate(f'window.scrollBy(0, {amount});')
+        dy = amount
     else:
-        await page.evaluate('window.scrollBy(0, window.innerHeight);')
+        viewport_height = ctx.memory.get('viewport_height')
+        if viewport_height is None:
+            viewport_height = await page.evaluate('() => window.innerHeight')
+            ctx.memory['viewport_height'] = viewport_height
+        dy = viewport_height
 
-    amount_str = f'{amount} pixels' if amount != 0 else 'one page'
+    # A synthetic wheel event is one structured CDP command (no JS parse) and
+    # also drives pages that hijack wheel scrolling, e.g. infinite feeds.
+    await page.mouse.wheel(0, dy)
 
-    return ActionResult(action_name="scroll_down", action_result_msg=f'Scrolled down the page by {amount_str}', success=True)
+    direction = 'up' if amount < 0 else 'down'
+    amount_str = f'{abs(amount)} pixels' if amount != 0 else 'one page'
 
+    return ActionResult(action_name="scroll", action_result_msg=f'Scrolled {direction} the page by {amount_str}', success=True)
 
-async def scroll_up(ctx: RunContextWrapper[MyAgentContext], amount: int) -> ActionResult:
-    """Scroll up the page by a specified amount of pixels.
-    
-    Args:
-        amount: int - The number of pixels to scroll up. If 0, scrolls up one page height.
-    """
-    page = await ctx.browser_context.get_current_page()
-
-    if amount != 0:
-        await page.evaluate(f'window.scrollBy(0, -{amount});')
-    else:
-        await page.evaluate('window.scrollBy(0, -window.innerHeight);')
 
-    amount_str = f'{amount} pixels' if amount != 0 else 'one page'
+async def wait(ctx: RunContextWrapper[MyAgentContext], seconds: float) -> ActionResult:
+    """Wait for the page to settle, e.g. for an animation or a delayed widget to finish.
 
-    return ActionResult(action_name="scroll_up", action_result_msg=f'Scrolled up the page by {amount_str}', success=True)
+    Args:
+        seconds: float - How long to wait. Fractional values are encouraged; most page settles need well under a second.
+    """
+    # Clamp so the LLM can neither busy-spin the loop nor stall the whole run
+    seconds = min(max(seconds, 0.05), 10.0)
+    await asyncio.sleep(seconds)
+    return ActionResult(action_name="wait", action_result_msg=f'Waited for {seconds} seconds', success=True)
 
 
 async def send_keys(ctx: RunContextWrapper[MyAgentContext], keys: str) -> ActionResult:
@@ -204,15 +327,14 @@ async def send_keys(ctx: RunContextWrapper[MyAgentContext], keys: str) -> Action
         await page.keyboard.press(keys)
     except Exception as e:
         if 'Unknown key' in str(e):
-            for key in keys:    # loop over the keys and try to send each one
-                try:
-                    await page.keyboard.press(key)
-                except Exception as e:
-                    logger.error(f'Error sending key {key}: {str(e)}')
-                    raise e
+            # Not a named key, so it's plain text; type batches the whole
+            # string in one protocol call instead of one press per character
+            await page.keyboard.type(keys)
         else:
             raise e
-    
+
+    # Key presses (Enter, Escape, typed text) routinely change the page
+    _invalidate_selector_map(ctx)
     return ActionResult(action_name="send_keys", action_result_msg=f'Sent keys: {keys}', success=True)
 
 
@@ -224,28 +346,17 @@ async def scroll_to_text(ctx: RunContextWrapper[MyAgentContext], text: str) -> A
     """
     page = await ctx.browser_context.get_current_page()
     try:
-        # Try different locator strategies
-        locators = [
-            page.get_by_text(text, exact=False),
-            page.locator(f'text={text}'),
-            page.locator(f"//*[contains(text(), '{text}')]"),
-        ]
-
-        for locator in locators:
-            try:
-                # First check if element exists and is visible
-                if await locator.count() > 0 and await locator.first.is_visible():
-                    await locator.first.scroll_into_view_if_needed()
-                    await asyncio.sleep(0.5)  # Wait for scroll to complete
-                    return ActionResult(action_name="scroll_to_text", 
-                                        action_result_msg=f'Scrolled to text: {text}',
-                                        success=True)
-            except Exception as e:
-                logger.error(f'Locator attempt failed: {str(e)}')
-                continue
-
-        return ActionResult(action_name="scroll_to_text", 
-                            action_result_msg=f"Text '{text}' not found or not visible on page", 
+        # One evaluate does the text search, visibility check and scroll in a
+        # single round-trip instead of probing several locator strategies.
+        found = await page.evaluate(_SCROLL_TO_TEXT_JS, text)
+        if found:
+            await asyncio.sleep(0.5)  # Wait for scroll to complete
+            return ActionResult(action_name="scroll_to_text",
+                                action_result_msg=f'Scrolled to text: {text}',
+                                success=True)
+
+        return ActionResult(action_name="scroll_to_text",
+                            action_result_msg=f"Text '{text}' not found or not visible on page",
                             success=False)
 
     except Exception as e:
@@ -261,53 +372,48 @@ async def get_dropdown_options(ctx: RunContextWrapper[MyAgentContext], index: in
         index: int - The index of the dropdown element.
     """
     page = await ctx.browser_context.get_current_page()
-    selector_map = await ctx.browser_context.get_selector_map()
-    dom_element = selector_map[index]
+    dom_element = await _get_dom_element(ctx, index)
 
     try:
-        # Frame-aware approach since we know it works
+        # The dropdown almost always lives in the main frame; probe it alone
+        # before fanning out to every frame.
+        main_frame_options = await page.main_frame.evaluate(_DROPDOWN_OPTIONS_JS, dom_element.xpath)
+        if main_frame_options:
+            frames = [page.main_frame]
+            results = [main_frame_options]
+        else:
+            # Frame-aware approach since we know it works. Each evaluate is an
+            # independent CDP round-trip, so probe the content frames
+            # concurrently; about:/data: frames cannot hold the dropdown.
+            frames = [frame for frame in page.frames
+                      if frame.url and not frame.url.startswith(('about:', 'data:'))]
+            results = await asyncio.gather(
+                *(frame.evaluate(_DROPDOWN_OPTIONS_JS, dom_element.xpath) for frame in frames),
+                return_exceptions=True,
+            )
+
         all_options = []
-        frame_index = 0
+        for frame_index, options in enumerate(results):
+            if isinstance(options, Exception):
+                logger.error(f'Frame {frame_index} evaluation failed: {str(options)}')
+                continue
 
-        for frame in page.frames:
-            try:
-                options = await frame.evaluate(
-                    """
-                    (xpath) => {
-                        const select = document.evaluate(xpath, document, null,
-                            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
-                        if (!select) return null;
-
-                        return {
-                            options: Array.from(select.options).map(opt => ({
-                                text: opt.text, //do not trim, because we are doing exact match in select_dropdown_option
-                                value: opt.value,
-                                index: opt.index
-                            })),
-                            id: select.id,
-                            name: select.name
-                        };
-                    }
-                """,
-                    dom_element.xpath,
-                )
+            if options:
+                # Remember where the dropdown lives so select_dropdown_option
+                # can jump straight to this frame instead of rescanning.
+                ctx.memory.setdefault('dropdown_frame_url_by_index', {})[index] = frames[frame_index].url
 
-                if options:
+                if logger.isEnabledFor(logging.DEBUG):
                     logger.debug(f'Found dropdown in frame {frame_index}')
                     logger.debug(f'Dropdown ID: {options["id"]}, Name: {options["name"]}')
 
-                    formatted_options = []
-                    for opt in options['options']:
-                        # encoding ensures AI uses the exact string in select_dropdown_option
-                        encoded_text = json.dumps(opt['text'])
-                        formatted_options.append(f'{opt["index"]}: text={encoded_text}')
+                formatted_options = []
+                for opt in options['options']:
+                    # encoding ensures AI uses the exact string in select_dropdown_option
+                    encoded_text = json.dumps(opt['text'])
+                    formatted_options.append(f'{opt["index"]}: text={encoded_text}')
 
-                    all_options.extend(formatted_options)
-
-            except Exception as frame_e:
-                logger.error(f'Frame {frame_index} evaluation failed: {str(frame_e)}')
-
-            frame_index += 1
+                all_options.extend(formatted_options)
 
         if all_options:
             msg = '\n'.join(all_options)
@@ -329,8 +435,7 @@ async def select_dropdown_option(ctx: RunContextWrapper[MyAgentContext], index:
         text: str - The text of the option to select.
     """
     page = await ctx.browser_context.get_current_page()
-    selector_map = await ctx.browser_context.get_selector_map()
-    dom_element = selector_map[index]
+    dom_element = await _get_dom_element(ctx, index)
 
     # Validate that we're working with a select element
     if dom_element.tag_name != 'select':
@@ -339,74 +444,84 @@ async def select_dropdown_option(ctx: RunContextWrapper[MyAgentContext], index:
             action_result_msg=f'Cannot select option: Element with index {index} is a {dom_element.tag_name}, not a select',
             success=False)
 
-    logger.debug(f"Attempting to select '{text}' using xpath: {dom_element.xpath}")
-    logger.debug(f'Element attributes: {dom_element.attributes}')
-    logger.debug(f'Element tag: {dom_element.tag_name}')
+    # These dumps format large attribute dicts; skip them entirely when DEBUG is off
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Attempting to select '{text}' using xpath: {dom_element.xpath}")
+        logger.debug(f'Element attributes: {dom_element.attributes}')
+        logger.debug(f'Element tag: {dom_element.tag_name}')
 
     xpath = '//' + dom_element.xpath
 
+    # Fast path: a plain id selector hits the browser's native CSS engine,
+    # which is much cheaper than evaluating XPath in every frame.
+    element_id = dom_element.attributes.get('id')
+    if element_id and re.fullmatch(r'[A-Za-z][\w\-]*', element_id):
+        try:
+            selected_option_values = await page.locator(f'select#{element_id}').nth(0).select_option(label=text, timeout=1000)
+            # Selecting fires onchange handlers that can rewrite the page
+            _invalidate_selector_map(ctx)
+            return ActionResult(action_name="select_dropdown_option",
+                                action_result_msg=f'Selected option {text} with value {selected_option_values}',
+                                success=True)
+        except Exception as e:
+            logger.debug(f'id fast path failed for select#{element_id}, falling back to frames: {str(e)}')
+
     try:
-        frame_index = 0
-        for frame in page.frames:
+        # The element almost always lives in the main frame; try it first and
+        # skip frames that cannot contain page content (empty / synthetic URLs).
+        candidate_frames = [page.main_frame]
+        candidate_frames.extend(
+            frame for frame in page.frames
+            if frame != page.main_frame and frame.url and not frame.url.startswith(('about:', 'data:')))
+
+        # If get_dropdown_options already located this dropdown, try that frame first
+        cached_frame_url = ctx.memory.get('dropdown_frame_url_by_index', {}).get(index)
+        if cached_frame_url is not None:
+            for position, frame in enumerate(candidate_frames):
+                if frame.url == cached_frame_url:
+                    candidate_frames.insert(0, candidate_frames.pop(position))
+                    break
+
+        # Probe every candidate frame concurrently, then select in the first
+        # one (in candidate order) that actually contains the dropdown.
+        probe_results = await asyncio.gather(
+            *(frame.evaluate(_FIND_DROPDOWN_JS, dom_element.xpath) for frame in candidate_frames),
+            return_exceptions=True,
+        )
+
+        for frame_index, (frame, dropdown_info) in enumerate(zip(candidate_frames, probe_results)):
+            if isinstance(dropdown_info, Exception):
+                logger.error(f'Frame {frame_index} attempt failed: {str(dropdown_info)}')
+                logger.error(f'Frame URL: {frame.url}')
+                continue
+
+            if not dropdown_info:
+                continue
+
+            if not dropdown_info.get('found'):
+                logger.error(f'Frame {frame_index} error: {dropdown_info.get("error")}')
+                continue
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f'Found dropdown in frame {frame_index}: {dropdown_info}')
+
             try:
-                logger.debug(f'Trying frame {frame_index} URL: {frame.url}')
-
-                # First verify we can find the dropdown in this frame
-                find_dropdown_js = """
-                    (xpath) => {
-                        try {
-                            const select = document.evaluate(xpath, document, null,
-                                XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
-                            if (!select) return null;
-                            if (select.tagName.toLowerCase() !== 'select') {
-                                return {
-                                    error: `Found element but it's a ${select.tagName}, not a SELECT`,
-                                    found: false
-                                };
-                            }
-                            return {
-                                id: select.id,
-                                name: select.name,
-                                found: true,
-                                tagName: select.tagName,
-                                optionCount: select.options.length,
-                                currentValue: select.value,
-                                availableOptions: Array.from(select.options).map(o => o.text.trim())
-                            };
-                        } catch (e) {
-                            return {error: e.toString(), found: false};
-                        }
-                    }
-                """
-
-                dropdown_info = await frame.evaluate(find_dropdown_js, dom_element.xpath)
-
-                if dropdown_info:
-                    if not dropdown_info.get('found'):
-                        logger.error(f'Frame {frame_index} error: {dropdown_info.get("error")}')
-                        continue
-
-                    logger.debug(f'Found dropdown in frame {frame_index}: {dropdown_info}')
-
-                    # "label" because we are selecting by text
-                    # nth(0) to disable error thrown by strict mode
-                    # timeout=1000 because we are already waiting for all network events, therefore ideally we don't need to wait a lot here (default 30s)
-                    selected_option_values = (
-                        await frame.locator('//' + dom_element.xpath).nth(0).select_option(label=text, timeout=1000)
-                    )
-
-                    return ActionResult(action_name="select_dropdown_option", 
-                                        action_result_msg=f'Selected option {text} with value {selected_option_values}', 
-                                        success=True)
+                # "label" because we are selecting by text
+                # nth(0) to disable error thrown by strict mode
+                # timeout=1000 because we are already waiting for all network events, therefore ideally we don't need to wait a lot here (default 30s)
+                selected_option_values = (
+                    await frame.locator('//' + dom_element.xpath).nth(0).select_option(label=text, timeout=1000)
+                )
 
+                _invalidate_selector_map(ctx)
+                return ActionResult(action_name="select_dropdown_option",
+                                    action_result_msg=f'Selected option {text} with value {selected_option_values}',
+                                    success=True)
             except Exception as frame_e:
                 logger.error(f'Frame {frame_index} attempt failed: {str(frame_e)}')
-                logger.error(f'Frame type: {type(frame)}')
                 logger.error(f'Frame URL: {frame.url}')
 
-            frame_index += 1
-
-        return ActionResult(action_name="select_dropdown_option", 
+        return ActionResult(action_name="select_dropdown_option",
                             action_result_msg=f"Could not select option '{text}' in any frame", 
                             success=False)
 
@@ -478,6 +593,37 @@ async def crawler_extract_content(ctx: RunContextWrapper[MyAgentContext], extrac
                         success=action_result.success)
     
 
+def _read_and_format_file(file_path: str) -> str:
+    _, file_extension = os.path.splitext(file_path)
+    file_extension = file_extension.lower()
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    formatted_content = f"Content of file '{file_path}':\n"
+
+    if file_extension == '.csv':
+        reader = csv.reader(content.splitlines())
+        rows = list(reader)
+        if not rows:
+            formatted_content += "(empty CSV)"
+        else:
+            # Use tabulate for better table formatting
+            headers = rows[0] if rows else []
+            table_data = rows[1:] if len(rows) > 1 else []
+            formatted_content += tabulate(table_data, headers=headers, tablefmt="grid")
+    elif file_extension == '.json':
+        try:
+            parsed_json = orjson.loads(content)
+            formatted_content += orjson.dumps(parsed_json, option=orjson.OPT_INDENT_2).decode()
+        except orjson.JSONDecodeError as e:
+            formatted_content += f"Error decoding JSON: {e}\nRaw content:\n{content}"
+    else: # Plain text or other
+        formatted_content += content
+
+    return formatted_content
+
+
 async def print_file_content(ctx: RunContextWrapper[MyAgentContext], file_path: str) -> ActionResult:
     """Reads the content of a file and prints it into our conversation.
     Supported extensions: .csv, .json. Other extensions will be treated as plain text.
@@ -486,33 +632,9 @@ async def print_file_content(ctx: RunContextWrapper[MyAgentContext], file_path:
         file_path: str - The path to the file to read.
     """
     try:
-        _, file_extension = os.path.splitext(file_path)
-        file_extension = file_extension.lower()
-
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        formatted_content = f"Content of file '{file_path}':\n"
-
-        if file_extension == '.csv':
-            reader = csv.reader(content.splitlines())
-            rows = list(reader)
-            if not rows:
-                formatted_content += "(empty CSV)"
-            else:
-                # Use tabulate for better table formatting
-                headers = rows[0] if rows else []
-                table_data = rows[1:] if len(rows) > 1 else []
-                formatted_content += tabulate(table_data, headers=headers, tablefmt="grid")
-        elif file_extension == '.json':
-            try:
-                parsed_json = json.loads(content)
-                formatted_content += json.dumps(parsed_json, indent=2)
-            except json.JSONDecodeError as e:
-                formatted_content += f"Error decoding JSON: {e}\nRaw content:\n{content}"
-        else: # Plain text or other
-            formatted_content += content
-
+        # The read and the CSV/JSON formatting are blocking; keep them off the
+        # event loop so concurrent browser work is not stalled
+        formatted_content = await asyncio.to_thread(_read_and_format_file, file_path)
         return ActionResult(action_name="print_file_content", action_result_msg=formatted_content, success=True)
 
     except FileNotFoundError:
@@ -551,50 +673,84 @@ async def extract_rows(ctx: RunContextWrapper[MyAgentContext], extraction_goal:
 
 
 
+@lru_cache(maxsize=None)
+def _openai_tool_schema(tool: Callable) -> dict:
+    # function_schema introspects signatures and builds pydantic models; the
+    # result only depends on the tool, so derive it once per process.
+    function_tool_schema = function_schema(tool)
+    return {
+        "type": "function",
+        "name": function_tool_schema.name,
+        "parameters": function_tool_schema.params_json_schema,
+        "strict": function_tool_schema.strict_json_schema,
+        "description": function_tool_schema.description,
+    }
+
+
+@lru_cache(maxsize=None)
+def _tools_schema_for(tools: tuple) -> list[dict]:
+    # One shared schema list per distinct tool set: every navigator/crawler/
+    # extractor instance with the same tools points at the same object.
+    return [_openai_tool_schema(tool) for tool in tools]
+
+
+@lru_cache(maxsize=None)
+def _tools_schema_json_for(tools: tuple) -> bytes:
+    # Pre-serialized variant for callers that build request bodies themselves
+    # (e.g. Batch API JSONL rows), encoded once per tool set.
+    return orjson.dumps(_tools_schema_for(tools))
+
+
 class MyAgentTools:
     def __init__(self, ctx: MyAgentContext, tools: List[Callable[[RunContextWrapper[MyAgentContext], Any], Awaitable[ActionResult]]]):
         self.ctx = ctx
-        self.tools = list(tools)
+        self.tools = tuple(tools)
+        self.tools_by_name = {tool.__name__: tool for tool in self.tools}
+        # ctx pre-bound once per tool; partial is C-implemented, so dispatch
+        # is a dict probe plus a cheap call
+        self.tool_invokers = {name: partial(tool, self.ctx) for name, tool in self.tools_by_name.items()}
 
     def get_tools(self):
         return self.tools
 
-    @cached_property
+    @property
     def tools_schema(self) -> list[dict]:
-        tools_schema: list[dict] = []
-        for tool in self.tools:
-            function_tool_schema = function_schema(tool)
-            tools_schema.append({
-                "type": "function",
-                "name": function_tool_schema.name,
-                "parameters": function_tool_schema.params_json_schema,
-                "strict": function_tool_schema.strict_json_schema,
-                "description": function_tool_schema.description,
-            })
-        return tools_schema
+        return _tools_schema_for(self.tools)
+
+    @property
+    def tools_schema_json(self) -> bytes:
+        return _tools_schema_json_for(self.tools)
 
     async def execute_tool(self, function_tool_call: ResponseFunctionToolCall) -> ActionResult:
         tool_name = function_tool_call.name
-        tool = next((t for t in self.tools if t.__name__ == tool_name), None)
-        if not tool:
+        invoker = self.tool_invokers.get(tool_name)
+        if not invoker:
             return ActionResult(action_name="execute_tool", action_result_msg=f"Tool '{tool_name}' not found", success=False)
 
-        tool_args = json.loads(function_tool_call.arguments)
-        return await tool(self.ctx, **tool_args)
+        # orjson decodes the small argument dicts several times faster than stdlib json
+        tool_args = orjson.loads(function_tool_call.arguments)
+        return await invoker(**tool_args)
 
     async def handle_tool_call(self, current_step: int, response: Response, message_manager: Any) -> ActionResult:
-        tool_call_generator = (item for item in response.output if isinstance(item, ResponseFunctionToolCall))
+        # Cheap attribute narrow instead of isinstance against the imported class
+        tool_call_generator = (item for item in response.output if getattr(item, 'type', None) == 'function_call')
         function_tool_call: ResponseFunctionToolCall = next(tool_call_generator, None)
 
         if not function_tool_call:
             raise RuntimeError('No function tool call detected')
             
-        logger.info(f"Step {current_step}, Function Tool Call:\n{format_json_pretty(function_tool_call.to_json())}")
+        # The pretty-printed dumps are expensive; skip them entirely when INFO is off
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Step {current_step}, Function Tool Call:\n{format_obj_pretty(function_tool_call.model_dump())}")
         message_manager.add_ai_function_tool_call_message(function_tool_call=function_tool_call,
                                                           ephemeral=False)
 
+        # Each step rebuilt the browser state (and renumbered the element
+        # indices) since the last tool ran, so never reuse the old map
+        _invalidate_selector_map(self.ctx)
         action_result = await self.execute_tool(function_tool_call=function_tool_call)
-        logger.info(f'Step {current_step}, Function Tool Call Result:\n{format_json_pretty(action_result.model_dump_json())}')
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f'Step {current_step}, Function Tool Call Result:\n{format_obj_pretty(asdict(action_result))}')
         message_manager.add_tool_result_message(result_message=action_result.action_result_msg,
                                                 tool_call_id=function_tool_call.call_id,
                                                 ephemeral=False)
@@ -618,11 +774,11 @@ NAVIGATOR_TOOLS: List[Callable[[RunContextWrapper[MyAgentContext], Any], Awaitab
     # send_keys,    
     open_tab,
     switch_tab,
-    # scroll_down,
-    # scroll_up,
+    # scroll,
     # scroll_to_text,
     get_dropdown_options,
     select_dropdown_option,
+    wait,
 ]
 
 CRAWLER_TOOLS: List[Callable[[RunContextWrapper[MyAgentContext], Any], Awaitable[ActionResult]]] = [
@@ -643,4 +799,9 @@ EXTRACTOR_TOOLS: List[Callable[[RunContextWrapper[MyAgentContext], Any], Awaitab
     send_keys,
     get_dropdown_options,
     select_dropdown_option,
-]
\ No newline at end of file
+]
+
+# Build every schema once at import so no agent pays the reflection cost at
+# construction or first-call time.
+for _tool_list in (BRAIN_TOOLS, NAVIGATOR_TOOLS, CRAWLER_TOOLS, EXTRACTOR_TOOLS):
+    _tools_schema_for(tuple(_tool_list))
\ No newline at end of file
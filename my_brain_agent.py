@@ -1,5 +1,5 @@
+import asyncio
 import logging
-from pathlib import Path
 
 import my_utils
 from my_agent_tools import ActionResult, MyAgentTools, BRAIN_TOOLS
@@ -18,10 +18,10 @@ class MyBrainAgent():
                                               ephemeral=False)
     
     def get_user_prompt(self) -> str:
-        return Path("my_brain_user_01.md").read_text()
-            
+        return my_utils.read_prompt_file("my_brain_user_01.md")
+
     def get_system_prompt(self) -> str:
-        return Path("my_brain_system_02.md").read_text()
+        return my_utils.read_prompt_file("my_brain_system_02.md")
 
 
     async def run(self) -> ActionResult:
@@ -48,12 +48,15 @@ class MyBrainAgent():
         self.message_manager.add_ai_message(content=f"Current step: {step_number}", ephemeral=False)
         messages = self.message_manager.get_messages()
         
-        my_utils.MessageManager.persist_state(messages=messages, 
-                                              step_number=step_number, 
-                                              save_dir=f"{self.ctx.save_dir}/brain_agent")
+        # Persisting the step state is disk I/O only; overlap it with the LLM round-trip
+        persist_task = asyncio.create_task(
+            asyncio.to_thread(my_utils.MessageManager.persist_state,
+                              messages=messages,
+                              step_number=step_number,
+                              save_dir=f"{self.ctx.save_dir}/brain_agent"))
 
         logger.info(f"Step {step_number}, Sending messages to the model...")
-        response = self.ctx.openai_client.responses.create(
+        response = await self.ctx.openai_client.responses.create(
             model="gpt-4.1",
             # reasoning={"effort": "medium", "summary": "detailed"},
             input=messages,
@@ -64,6 +67,7 @@ class MyBrainAgent():
             temperature=0.0     # Not supported for o3 and o4-mini
         )
         my_utils.log_openai_response_info(logger=logger, response=response, step_number=step_number)
+        await persist_task
 
         if response.output_text:
             logger.info(f"Step {step_number}, Response Message:\n{response.output_text}")
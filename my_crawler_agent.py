@@ -1,6 +1,8 @@
-import json
+import asyncio
 import logging
 
+import orjson
+
 from openai.types.responses import Response
 
 from my_agent_tools import CRAWLER_TOOLS, MyAgentTools, ActionResult
@@ -19,15 +21,14 @@ class MyCrawlerAgent:
         self.message_manager.add_user_message(
             content=(f"extraction_goal: {self.extraction_goal}\n\n"
                      "json_schema:\n"
-                     f"```json\n{json.dumps(row_schema, indent=2)}\n```\n"),
+                     f"```json\n{orjson.dumps(row_schema, option=orjson.OPT_INDENT_2).decode()}\n```\n"),
             ephemeral=False
         )
 
         self.my_agent_tools = MyAgentTools(ctx=self.ctx, tools=CRAWLER_TOOLS) 
 
     def _read_system_prompt(self) -> str:
-        with open( "my_crawler_system_03.md", "r", encoding="utf-8") as fh:
-            return fh.read()
+        return my_utils.read_prompt_file("my_crawler_system_03.md")
 
  
     async def run(self) -> ActionResult:
@@ -58,12 +59,15 @@ class MyCrawlerAgent:
         )
         messages.extend(browser_state_messages)
 
-        my_utils.MessageManager.persist_state(messages=messages, 
-                                              step_number=step_number, 
-                                              save_dir=f"{self.ctx.save_dir}/{self.ctx.agent_id:02d}_crawler_agent")
+        # Persisting the step state is disk I/O only; overlap it with the LLM round-trip
+        persist_task = asyncio.create_task(
+            asyncio.to_thread(my_utils.MessageManager.persist_state,
+                              messages=messages,
+                              step_number=step_number,
+                              save_dir=f"{self.ctx.save_dir}/{self.ctx.agent_id:02d}_crawler_agent"))
 
         logger.info(f'Step {step_number} - sending messages to LLM')
-        response: Response = self.ctx.openai_client.responses.create(
+        response: Response = await self.ctx.openai_client.responses.create(
             model="gpt-4.1",
             input=messages,
             tools=self.my_agent_tools.tools_schema,
@@ -73,7 +77,8 @@ class MyCrawlerAgent:
             temperature=0.0,
         )
         my_utils.log_openai_response_info(logger=logger, response=response, step_number=step_number)
-        
+        await persist_task
+
         await self.ctx.browser_context.remove_highlights()
     
         if response.output_text:
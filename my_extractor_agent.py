@@ -1,14 +1,14 @@
+import asyncio
 import csv
 import datetime
-import json
 import logging
 import os
-import html2text
+
+import orjson
 
 from openai.types.responses import Response
 
 from my_agent_tools import EXTRACTOR_TOOLS, MyAgentTools, ActionResult
-import markdownify
 import my_utils
 
 logger = logging.getLogger(__name__)
@@ -25,7 +25,7 @@ class MyExtractorAgent:
             content=("You are tasked with extracting structured data from a webpage.\n"
                      f"Extraction goal: {self.extraction_goal}\n\n"
                      "The caller provided the JSON schema of a *single row* that must be adhered to:\n"
-                     f"```json\n{json.dumps(row_schema, indent=2)}\n```\n"
+                     f"```json\n{orjson.dumps(row_schema, option=orjson.OPT_INDENT_2).decode()}\n```\n"
                      "Produce a JSON array where each element respects that schema."),
             ephemeral=False
         )
@@ -34,8 +34,7 @@ class MyExtractorAgent:
         self.output_schema = my_utils.convert_simplified_schema_to_rows_in_openai_output_schema(row_schema)
         
     def _read_system_prompt(self) -> str:
-        with open( "my_extractor_system_00.md", "r", encoding="utf-8") as fh:
-            return fh.read()
+        return my_utils.read_prompt_file("my_extractor_system_00.md")
         
     async def run(self) -> ActionResult:
         logger.info(f'Starting extraction task at {self.ctx.run_id}')
@@ -57,11 +56,9 @@ class MyExtractorAgent:
             timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
             csv_path = os.path.abspath(f"{self.ctx.save_dir}/extracted_{timestamp}.csv")
 
-            fieldnames = list(extracted_rows[0].keys()) if extracted_rows else []
-            with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(extracted_rows)
+            # Blocking disk write: run it in a worker thread so sibling agents
+            # sharing the event loop keep moving
+            await asyncio.to_thread(self._write_rows_csv, csv_path, extracted_rows)
 
             logger.info(f'Extracted {len(extracted_rows)} rows and saved to {csv_path}')
             
@@ -76,30 +73,42 @@ class MyExtractorAgent:
                 action_result_msg='Extraction failed: No content was found on the page that could be extracted.', 
                 success=False)
 
+    @staticmethod
+    def _write_rows_csv(csv_path: str, extracted_rows: list[dict]) -> None:
+        fieldnames = list(extracted_rows[0].keys())
+        with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(extracted_rows)
+
     async def step(self, step_number: int) -> ActionResult:
         my_utils.log_step_info(logger=logger, step_number=step_number, max_steps=self.max_steps, agent_name="Extractor Agent")
                 
         page = await self.ctx.browser_context.get_current_page()
-        html = await page.content()
-        # markdown_content = markdownify.markdownify(html)
+        # The HTML fetch and the screenshot are independent browser round-trips
+        html, current_state_messages = await asyncio.gather(
+            page.content(),
+            my_utils.get_screenshot_message(browser_context=self.ctx.browser_context, full_page=True))
 
-        current_state_messages = await my_utils.get_screenshot_message(browser_context=self.ctx.browser_context, full_page=True)
         current_state_messages.append(
             {
                 'role': 'user',
                 'content': (
-                    f'Here is the full page content:\n' + html2text.html2text(html)
+                    f'Here is the full page content:\n' + my_utils.html_to_markdown(html)
                 ),
             })
         messages = self.message_manager.get_messages()
         messages.extend(current_state_messages)
 
-        my_utils.MessageManager.persist_state(messages=messages, 
-                                              step_number=step_number, 
-                                              save_dir=f"{self.ctx.save_dir}/{self.ctx.agent_id:02d}_extractor_agent")
+        # Persisting the step state is disk I/O only; overlap it with the LLM round-trip
+        persist_task = asyncio.create_task(
+            asyncio.to_thread(my_utils.MessageManager.persist_state,
+                              messages=messages,
+                              step_number=step_number,
+                              save_dir=f"{self.ctx.save_dir}/{self.ctx.agent_id:02d}_extractor_agent"))
 
         logger.info(f'Step {step_number} - sending messages to LLM')
-        response: Response = self.ctx.openai_client.responses.create(
+        response: Response = await self.ctx.openai_client.responses.create(
             model="gpt-4.1",
             input=messages,
             text=self.output_schema,
@@ -110,6 +119,7 @@ class MyExtractorAgent:
             temperature=0.0,
         )
         my_utils.log_openai_response_info(logger=logger, response=response, step_number=step_number)
+        await persist_task
 
         await self.ctx.browser_context.remove_highlights()
     
@@ -117,7 +127,7 @@ class MyExtractorAgent:
             action_result = ActionResult(action_name="output_text",
                                          action_result_msg=f'Extraction completed.', 
                                          success=True,
-                                         content={'rows': json.loads(response.output_text)['rows']})
+                                         content={'rows': orjson.loads(response.output_text)['rows']})
         else:
             action_result = await self.my_agent_tools.handle_tool_call(current_step=step_number, 
                                                                         response=response,                 
@@ -1,5 +1,5 @@
+import asyncio
 import logging
-from pathlib import Path
 from my_agent_tools import ActionResult, MyAgentTools, NAVIGATOR_TOOLS
 import my_utils
 
@@ -19,11 +19,11 @@ class MyNavigatorAgent():
 
     @staticmethod
     def get_system_message() -> str:
-        return Path("my_navigator_system_02.md").read_text()
-        
+        return my_utils.read_prompt_file("my_navigator_system_02.md")
+
     @staticmethod
     def build_user_prompt(navigation_goal: str) -> str:
-        return Path("my_navigator_user_00.md").read_text().format(navigation_goal=navigation_goal)
+        return my_utils.read_prompt_file("my_navigator_user_00.md").format(navigation_goal=navigation_goal)
 
     async def run(self) -> ActionResult:
         logger.info(f'Starting navigator agent task at {self.ctx.run_id}')
@@ -52,12 +52,16 @@ class MyNavigatorAgent():
             include_screenshot=True
         )
         messages.extend(browser_state_message)
-        my_utils.MessageManager.persist_state(messages=messages, 
-                                              step_number=step_number,
-                                              save_dir=f"{self.ctx.save_dir}/{self.ctx.agent_id:02d}_navigator_agent")
-                
+        # Persisting the step state is disk I/O only; overlap it with the LLM round-trip
+        persist_task = asyncio.create_task(
+            asyncio.to_thread(my_utils.MessageManager.persist_state,
+                              messages=messages,
+                              step_number=step_number,
+                              save_dir=f"{self.ctx.save_dir}/{self.ctx.agent_id:02d}_navigator_agent"))
+
+
         logger.info(f"Step {step_number}, Sending messages to the model...")
-        response = self.ctx.openai_client.responses.create(
+        response = await self.ctx.openai_client.responses.create(
             # model="gpt-4.1-nano",
             # model="gpt-4.1-mini",
             model="gpt-4.1",
@@ -72,6 +76,7 @@ class MyNavigatorAgent():
             temperature=0.0     # Not supported for o3 and o4-mini
         )
         my_utils.log_openai_response_info(logger=logger, response=response, step_number=step_number)
+        await persist_task
 
         await self.ctx.browser_context.remove_highlights()
 
@@ -1,38 +1,80 @@
 import asyncio
 import datetime
+import functools
 import json
 import logging
 import os
+from pathlib import Path
 from typing import Type
 from pydantic import BaseModel
 from agents import AgentOutputSchema
 from openai.types.responses import ResponseFunctionToolCall
-import base64
 import copy
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import json
 import logging
 from typing import Type
 from pydantic import BaseModel
 
-from openai import OpenAI
+import orjson
+import pybase64
+import tiktoken
+from selectolax.parser import HTMLParser
+from openai import AsyncOpenAI
 from openai.types.responses import ResponseFunctionToolCall, Response
 from browser_use.browser.context import BrowserContext
 
 
 logger = logging.getLogger(__name__)
 
+# One encoder for the whole process; get_encoding is expensive the first time
+_TOKEN_ENCODER = tiktoken.get_encoding("o200k_base")
+
+# Shared by every place that embeds or strips an inline screenshot. Building the
+# URL with a plain concat avoids the f-string re-copy of the multi-MB payload.
+DATA_URL_PNG_PREFIX = "data:image/png;base64,"
+
+# Attributes rendered into the clickable-elements text; constant, so hoisted out
+# of the per-step state builder.
+INCLUDE_ATTRIBUTES: tuple[str, ...] = (
+    'title',
+    'type',
+    'name',
+    'role',
+    'aria-label',
+    'placeholder',
+    'value',
+    'alt',
+    'aria-expanded',
+)
+
+# Static skeleton of the per-step state message; only the placeholders vary
+BROWSER_STATE_TEMPLATE = (
+    "[Current browser state starts here]\n"
+    "Current step: {current_step}\n"
+    "Current date and time: {current_datetime}\n"
+    "Current url: {url}\n"
+    "Available tabs:\n{tabs}\n"
+    "Interactive elements from top layer of the current page inside the viewport:\n{elements_text}\n"
+    "[Current browser state ends here]"
+)
+
 
 @dataclass
 class MyAgentContext:
     browser_context: BrowserContext
-    openai_client: OpenAI
+    openai_client: AsyncOpenAI
     save_dir: str
     run_id: str
 
     agent_id: int = -1
     memory: dict = None
 
+    # Per-step DOM snapshot cache, managed by my_agent_tools._get_selector_map.
+    step_id: int = 0
+    selector_map_cache: tuple = None
+
     def new_agent_context(self):
         return MyAgentContext(browser_context=self.browser_context,
                               openai_client=self.openai_client,
@@ -50,7 +92,14 @@ class MyAgentContext:
         return next_id
     
 
-def convert_pydantic_model_to_openai_output_schema(model: Type[BaseModel]) -> dict:    
+@functools.lru_cache(maxsize=None)
+def read_prompt_file(file_path: str) -> str:
+    """Read a prompt file once and keep it cached; prompts are static for the whole run."""
+    return Path(file_path).read_text()
+
+
+@functools.lru_cache(maxsize=None)
+def convert_pydantic_model_to_openai_output_schema(model: Type[BaseModel]) -> dict:
     agent_output_schema = AgentOutputSchema(model, strict_json_schema=True)
     schema = agent_output_schema.json_schema()
 
@@ -64,8 +113,12 @@ def convert_pydantic_model_to_openai_output_schema(model: Type[BaseModel]) -> di
     }
 
 
+@functools.lru_cache(maxsize=None)
 def convert_simplified_schema_to_rows_in_openai_output_schema(row_schema: str) -> dict:
     """Convert a simplified schema (where keys are field names and values are types) into a proper OpenAI output schema.
+
+    Cached on the raw schema string: the same extraction schema is reused by every
+    step of an agent (and often across agents), and JSON-schema building is pure.
     
     Args:
         row_schema: str - A JSON string containing a simplified schema where keys are field names and values are types.
@@ -107,58 +160,113 @@ def convert_simplified_schema_to_rows_in_openai_output_schema(row_schema: str) -
 
 
 class MessageManager:
-    def __init__(self, system_message_content: str):
-        self._messages: list[dict] = [{
+    """Keeps the conversation history for an agent.
+
+    Prompt-cache invariant: the stored history is append-only — system prompt
+    first, then the action/result trail — and earlier entries are never mutated.
+    Dynamic per-step observations (browser state, screenshots) must NOT be added
+    here; the agents append them to the copy returned by get_messages() so the
+    prompt prefix stays byte-stable across requests and OpenAI's prefix caching
+    keeps hitting.
+    """
+
+    __slots__ = ('max_history_tokens', '_messages', '_ephemeral_flags', '_token_counts', '_total_tokens')
+
+    def __init__(self, system_message_content: str, max_history_tokens: int = 200_000):
+        # Parallel lists aligned by index: the message dicts, their ephemeral
+        # flags, and their token counts (computed once on insert, never again).
+        self.max_history_tokens = max_history_tokens
+        self._messages: list[dict] = []
+        self._ephemeral_flags: list[bool] = []
+        self._token_counts: list[int] = []
+        self._total_tokens = 0
+
+        self._append_message({
             "role": "system",
             "content": system_message_content
-        }]
-        self._ephemeral_messages: dict[int, bool] = {0: False}  # Track ephemeral status by message index
-        
+        }, ephemeral=False)
+
+    @staticmethod
+    def count_message_tokens(message: dict) -> int:
+        text = message.get("content") or message.get("output") or message.get("arguments") or ""
+        if not isinstance(text, str):
+            text = str(text)
+        return len(_TOKEN_ENCODER.encode(text))
+
+    def _count_and_track_tokens(self, message: dict):
+        tokens = MessageManager.count_message_tokens(message)
+        self._token_counts.append(tokens)
+        self._total_tokens += tokens
+
+    def _append_message(self, message: dict, ephemeral: bool):
+        # Single bookkeeping path shared by every typed add_* helper
+        self._messages.append(message)
+        self._ephemeral_flags.append(ephemeral)
+        self._count_and_track_tokens(message)
+
     def add_user_message(self, content: str, ephemeral: bool):
-        self._messages.append({
+        self._append_message({
             "role": "user",
             "content": content
-        })
-        self._ephemeral_messages[len(self._messages) - 1] = ephemeral
+        }, ephemeral)
 
     def add_ai_message(self, content: str, ephemeral: bool):
-        self._messages.append({
+        self._append_message({
             "role": "assistant",
             "content": content,
-        })
-        self._ephemeral_messages[len(self._messages) - 1] = ephemeral
+        }, ephemeral)
 
     def add_ai_function_tool_call_message(self, function_tool_call: ResponseFunctionToolCall, ephemeral: bool):
-        self._messages.append({
+        self._append_message({
             "type": "function_call",
             "call_id": function_tool_call.call_id,
             "name": function_tool_call.name,
             "arguments": function_tool_call.arguments
-        })
-        self._ephemeral_messages[len(self._messages) - 1] = ephemeral
-        
+        }, ephemeral)
+
     def add_tool_result_message(self, result_message: str, tool_call_id: str, ephemeral: bool):
-        self._messages.append({
+        self._append_message({
             "type": "function_call_output",
             "call_id": tool_call_id,
             "output": result_message
-        })
-        self._ephemeral_messages[len(self._messages) - 1] = ephemeral
+        }, ephemeral)
+
+    def _remove_message_at(self, index: int):
+        self._total_tokens -= self._token_counts[index]
+        del self._messages[index]
+        del self._ephemeral_flags[index]
+        del self._token_counts[index]
+
+    def _trim_to_token_budget(self):
+        # Slide the window only when the budget is actually exceeded, so the
+        # prompt prefix stays byte-stable (and prompt-cacheable) between trims.
+        while self._total_tokens > self.max_history_tokens and len(self._messages) > 2:
+            # Never drop the system message at index 0
+            dropped = self._messages[1]
+            self._remove_message_at(1)
+
+            # Dropping a function_call without its output (or vice versa) would
+            # leave an orphaned call_id in the request, so evict the pair together.
+            call_id = dropped.get("call_id")
+            if call_id is not None:
+                for idx, message in enumerate(self._messages):
+                    if message.get("call_id") == call_id:
+                        self._remove_message_at(idx)
+                        break
 
     def get_messages(self) -> list[dict]:
-        return copy.deepcopy(self._messages)
+        # Shallow copy: callers extend the returned list with per-step state but
+        # never mutate the message dicts themselves, so the deep copy this used
+        # to do was O(history size) of pure waste every step.
+        self._trim_to_token_budget()
+        return list(self._messages)
 
     def remove_ephemeral_messages(self):
-        new_messages = []
-        new_ephemeral = {}
-        
-        for idx, msg in enumerate(self._messages):
-            if not self._ephemeral_messages.get(idx, False):
-                new_messages.append(msg)
-                new_ephemeral[len(new_messages) - 1] = False
-        
-        self._messages = new_messages
-        self._ephemeral_messages = new_ephemeral
+        keep = [idx for idx, ephemeral in enumerate(self._ephemeral_flags) if not ephemeral]
+        self._messages = [self._messages[idx] for idx in keep]
+        self._token_counts = [self._token_counts[idx] for idx in keep]
+        self._ephemeral_flags = [False] * len(keep)
+        self._total_tokens = sum(self._token_counts)
 
     @staticmethod
     def persist_state(messages: list[dict], step_number: int, save_dir: str):
@@ -181,15 +289,19 @@ class MessageManager:
                 for item in content:
                     if isinstance(item, dict) and item.get("type") == "input_image":
                         image_url: str = item.get("image_url", "")
-                        prefix = "data:image/png;base64,"
-                        if image_url.startswith(prefix):
-                            screenshots.append(image_url[len(prefix):])
+                        if image_url.startswith(DATA_URL_PNG_PREFIX):
+                            screenshots.append(image_url[len(DATA_URL_PNG_PREFIX):])
 
-        for idx, screenshot_base64 in enumerate(screenshots):
+        def write_screenshot(numbered_screenshot):
+            idx, screenshot_base64 = numbered_screenshot
             screenshot_file_name = f"{save_dir}/step_{step_number:02d}_screenshot_{idx:02d}.png"
-            with open(screenshot_file_name, "wb") as f:
-                f.write(base64.b64decode(screenshot_base64))
-            
+            Path(screenshot_file_name).write_bytes(pybase64.b64decode(screenshot_base64, validate=False))
+
+        # Same pattern as history_logger: SIMD decode + write per screenshot,
+        # overlapped on a small pool since both release the GIL.
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+            list(executor.map(write_screenshot, enumerate(screenshots)))
+
 
     @staticmethod
     def get_json_messages(messages: list[dict]):
@@ -258,6 +370,91 @@ class MessageManager:
         return formatted_messages_str
 
 
+_MARKDOWN_HEADING_PREFIX = {
+    'h1': '# ', 'h2': '## ', 'h3': '### ', 'h4': '#### ', 'h5': '##### ', 'h6': '###### '
+}
+
+# Tags whose subtrees carry no content for the LLM
+_MARKDOWN_SKIP_TAGS = frozenset({'script', 'style', 'noscript', 'svg', 'template', 'head', '-comment'})
+
+# Block-level tags that should force a line break around their content
+_MARKDOWN_BLOCK_TAGS = frozenset({
+    'p', 'div', 'section', 'article', 'header', 'footer', 'main', 'nav', 'aside',
+    'ul', 'ol', 'table', 'thead', 'tbody', 'tr', 'br', 'hr', 'blockquote', 'form'
+})
+
+
+def _emit_markdown(node, out: list[str]):
+    for child in node.iter(include_text=True):
+        tag = child.tag
+
+        if tag == '-text':
+            text = child.text_content
+            if text and not text.isspace():
+                out.append(text.strip())
+                out.append(' ')
+        elif tag in _MARKDOWN_SKIP_TAGS:
+            continue
+        elif tag in _MARKDOWN_HEADING_PREFIX:
+            out.append('\n' + _MARKDOWN_HEADING_PREFIX[tag] + child.text(deep=True, separator=' ', strip=True) + '\n')
+        elif tag == 'a':
+            text = child.text(deep=True, separator=' ', strip=True)
+            if text:
+                href = child.attributes.get('href') or ''
+                out.append(f'[{text}]({href})' if href else text)
+                out.append(' ')
+        elif tag == 'img':
+            alt = child.attributes.get('alt')
+            if alt:
+                out.append(f'![{alt}]')
+                out.append(' ')
+        elif tag == 'li':
+            out.append('\n* ')
+            _emit_markdown(child, out)
+            out.append('\n')
+        elif tag in ('td', 'th'):
+            _emit_markdown(child, out)
+            out.append('| ')
+        elif tag in _MARKDOWN_BLOCK_TAGS:
+            out.append('\n')
+            _emit_markdown(child, out)
+            out.append('\n')
+        else:
+            # Inline tags (span, b, strong, em, ...): just descend
+            _emit_markdown(child, out)
+
+
+def html_to_markdown(html: str) -> str:
+    """Convert page HTML into compact markdown for the LLM.
+
+    selectolax parses the HTML at C speed (lexbor), and the serializer only
+    emits the tags the model actually benefits from, instead of the full
+    pure-Python tree walk html2text/markdownify do.
+    """
+    tree = HTMLParser(html)
+
+    # Drop the subtrees that are pure overhead for the model before walking:
+    # script/style/svg payloads easily dominate the byte count on real pages,
+    # and every byte that survives becomes prompt tokens.
+    for node in tree.css('script, style, noscript, svg, template, iframe'):
+        node.decompose()
+    for node in tree.css('[hidden], [aria-hidden="true"], [style*="display:none"], [style*="display: none"]'):
+        node.decompose()
+
+    body = tree.body
+    if body is None:
+        return ''
+
+    out: list[str] = []
+    _emit_markdown(body, out)
+
+    markdown = ''.join(out)
+    # Collapse the runs of blank lines left by nested block tags
+    while '\n\n\n' in markdown:
+        markdown = markdown.replace('\n\n\n', '\n\n')
+    return markdown.strip()
+
+
 def recursively_parse_json_strings(item):
     """
     Recursively traverses a Python object (dict, list, or other)
@@ -269,10 +466,10 @@ def recursively_parse_json_strings(item):
         for k, v in item.items():
             if isinstance(v, str):
                 try:
-                    parsed_v = json.loads(v)
+                    parsed_v = orjson.loads(v)
                     # Recurse on the parsed value
                     new_dict[k] = recursively_parse_json_strings(parsed_v)
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     # If it's not valid JSON, keep the original string
                     new_dict[k] = v
             else:
@@ -284,10 +481,10 @@ def recursively_parse_json_strings(item):
         for i in item:
             if isinstance(i, str):
                 try:
-                    parsed_i = json.loads(i)
+                    parsed_i = orjson.loads(i)
                     # Recurse on the parsed value
                     new_list.append(recursively_parse_json_strings(parsed_i))
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     # If it's not valid JSON, keep the original string
                     new_list.append(i)
             else:
@@ -303,10 +500,16 @@ def format_json_pretty(json_str: str) -> str:
     Converts a JSON object to a pretty-formatted JSON string,
     recursively parsing any nested JSON strings within it.
     """
-    initial_parsed = json.loads(json_str)
-    deep_parsed = recursively_parse_json_strings(initial_parsed)
-    pretty_json_str = json.dumps(deep_parsed, indent=2)
-    return pretty_json_str
+    return format_obj_pretty(orjson.loads(json_str))
+
+
+def format_obj_pretty(obj) -> str:
+    """
+    Like format_json_pretty, but for already-parsed objects (dicts, lists),
+    skipping the serialize/re-parse round-trip.
+    """
+    deep_parsed = recursively_parse_json_strings(obj)
+    return orjson.dumps(deep_parsed, option=orjson.OPT_INDENT_2).decode()
 
 
 def log_step_info(logger: logging.Logger, step_number: int, max_steps: int, agent_name: str) -> None:
@@ -323,7 +526,7 @@ async def get_screenshot_message(browser_context: BrowserContext, full_page: boo
             "content": [
                 {
                     "type": "input_image",
-                    "image_url": f"data:image/png;base64,{screenshot_base64}",
+                    "image_url": DATA_URL_PNG_PREFIX + screenshot_base64,
                     "detail": "high"
                 }
             ]
@@ -333,18 +536,7 @@ async def get_screenshot_message(browser_context: BrowserContext, full_page: boo
 async def get_current_browser_state_message(current_step: int, browser_context: BrowserContext, include_screenshot: bool) -> list[dict]:
     browser_state = await browser_context.get_state()
 
-    include_attributes: list[str] = [
-        'title',
-        'type',
-        'name',
-        'role',
-        'aria-label',
-        'placeholder',
-        'value',
-        'alt',
-        'aria-expanded',
-    ]
-    elements_text = browser_state.element_tree.clickable_elements_to_string(include_attributes=include_attributes)
+    elements_text = browser_state.element_tree.clickable_elements_to_string(include_attributes=list(INCLUDE_ATTRIBUTES))
 
     if browser_context.config.viewport_expansion == -1:
         has_content_above = False
@@ -371,13 +563,12 @@ async def get_current_browser_state_message(current_step: int, browser_context:
             "content": [
                 {
                     "type": "input_text",
-                    "text": f"[Current browser state starts here]\n"
-                            f"Current step: {current_step}\n"
-                            f"Current date and time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
-                            f"Current url: {browser_state.url}\n"
-                            f"Available tabs:\n{browser_state.tabs}\n"
-                            f"Interactive elements from top layer of the current page inside the viewport:\n{elements_text}\n"
-                            f"[Current browser state ends here]"
+                    "text": BROWSER_STATE_TEMPLATE.format(
+                        current_step=current_step,
+                        current_datetime=datetime.datetime.now().strftime('%Y-%m-%d %H:%M'),
+                        url=browser_state.url,
+                        tabs=browser_state.tabs,
+                        elements_text=elements_text)
                 }
             ]
         }
@@ -389,7 +580,7 @@ async def get_current_browser_state_message(current_step: int, browser_context:
         ret['content'].append(
             {
                 "type": "input_image",
-                "image_url": f"data:image/png;base64, {screenshot_base64}",
+                "image_url": DATA_URL_PNG_PREFIX + screenshot_base64,
                 "detail": "high"
             }
         )